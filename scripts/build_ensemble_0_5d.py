@@ -5,6 +5,7 @@
 from __future__ import annotations
 import json, pathlib, statistics
 from typing import Dict, List, Any, Optional
+from publish import write_product
 
 PROC = pathlib.Path("data/processed")
 PROC.mkdir(parents=True, exist_ok=True)
@@ -85,9 +86,7 @@ def main():
         "days": out_days,
     }
 
-    (PROC / "consensus_0_5d.json").write_text(
-        json.dumps(out, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    write_product(PROC / "consensus_0_5d.json", out)
     print("consensus_0_5d.json written. sources_used =", out["meta"]["sources_used"])
 
 if __name__ == "__main__":
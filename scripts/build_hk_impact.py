@@ -1,6 +1,7 @@
 # scripts/build_hk_impact.py
 from __future__ import annotations
-import json, pathlib, time
+import pathlib, time
+from publish import write_heartbeat, write_product
 
 OUT = pathlib.Path("data/processed/hk_impact.json")
 
@@ -10,7 +11,9 @@ def main():
         "risk": "Low",
         "note": "MVP demo: impact metrics will be added when track/intensity ensemble is ready."
     }
-    OUT.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    write_product(OUT, payload, ignore=("as_of_utc",))
+    # 產品內容不變時 as_of_utc 不會更新；前端「更新時間」改讀 heartbeat.json
+    write_heartbeat(OUT.parent)
 
 if __name__ == "__main__":
     main()
@@ -1,6 +1,7 @@
 # scripts/build_leaderboard.py
 from __future__ import annotations
 import json, pathlib, time
+from publish import write_product
 
 INP = pathlib.Path("data/processed/normalized.json")
 OUT = pathlib.Path("data/processed/leaderboard.json")
@@ -20,7 +21,7 @@ def main():
         sorted_list = sorted(counts.items(), key=lambda kv: kv[1], reverse=True)
         lb["overall_best"] = sorted_list[0][0] if sorted_list else "—"
         lb["weights"] = {k: round(c/sum(counts.values()), 3) for k,c in counts.items()} if counts else {}
-    OUT.write_text(json.dumps(lb, ensure_ascii=False, indent=2), encoding="utf-8")
+    write_product(OUT, lb, ignore=("as_of_utc",))
 
 if __name__ == "__main__":
     main()
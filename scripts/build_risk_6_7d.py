@@ -2,13 +2,14 @@
 from __future__ import annotations
 import json, pathlib
 from collections import defaultdict
+from publish import write_product
 
 INP = pathlib.Path("data/processed/normalized.json")
 OUT = pathlib.Path("data/processed/risk_6_7d.json")
 
 def main():
     if not INP.exists():
-        OUT.write_text("{}", encoding="utf-8"); return
+        write_product(OUT, {}); return
     allprov = json.loads(INP.read_text(encoding="utf-8"))
 
     # 聚合同一天多來源，統計來源數
@@ -34,7 +35,7 @@ def main():
             "confidence": level,
             "note": "Extended outlook (6–7d). Confidence depends on how many agencies agree."
         })
-    OUT.write_text(json.dumps(out, ensure_ascii=False, indent=2), encoding="utf-8")
+    write_product(OUT, out)
 
 if __name__ == "__main__":
     main()
@@ -2,8 +2,11 @@
 # 內建專屬 mapper：HKO / JMA / MSS / METNO / SMG / BOM / NOAA
 from __future__ import annotations
 import json, pathlib, re, xml.etree.ElementTree as ET
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 from providers import PROVIDERS
+from publish import write_product
+from records import ForecastRecord
 
 RAW = pathlib.Path("data/raw")
 OUT = pathlib.Path("data/processed")
@@ -19,49 +22,59 @@ def _safe_get(d: Any, *keys, default=None):
             return default
     return cur
 
-def _clean_text(s: Optional[str]) -> Optional[str]:
-    if not isinstance(s, str):
-        return None
+_RE_WS = re.compile(r"\s+")
+_RE_YMD8 = re.compile(r"\d{8}")                         # 20251022
+_RE_YMD = re.compile(r"(\d{4})[-/](\d{2})[-/](\d{2})")  # 2025-10-22 / 2025/10/22（可帶時間）
+
+# 同一段文字/日期在各來源、各時段大量重複，以 LRU 快取
+@lru_cache(maxsize=4096)
+def _clean_text_cached(s: str) -> Optional[str]:
     s = s.replace("\u3000", " ").replace("\xa0", " ").strip()
-    s = re.sub(r"\s+", " ", s)
+    s = _RE_WS.sub(" ", s)
     return s or None
 
-def _as_iso_date(s: Optional[str]) -> Optional[str]:
-    if not s:
+def _clean_text(s: Optional[str]) -> Optional[str]:
+    if not isinstance(s, str):
         return None
-    s = str(s).strip()
-    if re.fullmatch(r"\d{8}", s):                  # 20251022
+    return _clean_text_cached(s)
+
+@lru_cache(maxsize=4096)
+def _as_iso_date_cached(s: str) -> str:
+    s = s.strip()
+    if _RE_YMD8.fullmatch(s):
         return f"{s[0:4]}-{s[4:6]}-{s[6:8]}"
-    m = re.match(r"(\d{4})[-/](\d{2})[-/](\d{2})", s)
+    m = _RE_YMD.match(s)
     if m:
         return f"{m.group(1)}-{m.group(2)}-{m.group(3)}"
-    m = re.match(r"(\d{4}-\d{2}-\d{2})", s)
-    if m:
-        return m.group(1)
     return s
 
+def _as_iso_date(s: Optional[str]) -> Optional[str]:
+    if not s:
+        return None
+    return _as_iso_date_cached(str(s))
+
 def _num(x):
     try:
         return float(x)
     except Exception:
         return None
 
-def _append(out: List[Dict[str, Any]], date, text, tmin=None, tmax=None, src=""):
+def _append(out: List[ForecastRecord], date, text, tmin=None, tmax=None, src=""):
     if not date and not text:
         return
-    out.append({
-        "date": _as_iso_date(date),
-        "text": _clean_text(text),
-        "tmin": tmin if (isinstance(tmin, (int, float)) or tmin is None) else _num(tmin),
-        "tmax": tmax if (isinstance(tmax, (int, float)) or tmax is None) else _num(tmax),
-        "src": (src or "").upper()
-    })
+    out.append(ForecastRecord(
+        _as_iso_date(date),
+        _clean_text(text),
+        tmin if (isinstance(tmin, (int, float)) or tmin is None) else _num(tmin),
+        tmax if (isinstance(tmax, (int, float)) or tmax is None) else _num(tmax),
+        (src or "").upper(),
+    ))
 
 # ---------- 各來源 mapper ----------
 # 1) HKO
-def _map_hko(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
+def _map_hko(raw: Dict[str, Any]) -> List[ForecastRecord]:
     wf = _safe_get(raw, "data", "weatherForecast", default=[]) or []
-    out: List[Dict[str, Any]] = []
+    out: List[ForecastRecord] = []
     for d in wf:
         _append(
             out,
@@ -74,11 +87,11 @@ def _map_hko(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
     return out
 
 # 2) JMA
-def _map_jma(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
+def _map_jma(raw: Dict[str, Any]) -> List[ForecastRecord]:
     arr = raw.get("data") if isinstance(raw.get("data"), list) else raw
     root = arr[0] if isinstance(arr, list) and arr else arr
     ts_list = _safe_get(root, "timeSeries", default=[]) or []
-    out: List[Dict[str, Any]] = []
+    out: List[ForecastRecord] = []
     for ts in ts_list:
         time_def = ts.get("timeDefines")
         areas = ts.get("areas")
@@ -89,18 +102,18 @@ def _map_jma(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
                     text = weathers[i] if i < len(weathers) else None
                     _append(out, t, text, src="JMA")
                 break
-    dedup: Dict[str, Dict[str, Any]] = {}
+    dedup: Dict[str, ForecastRecord] = {}
     for it in out:
-        d = it.get("date")
+        d = it.date
         if d and d not in dedup:
             dedup[d] = it
     return list(dedup.values())
 
 # 3) MSS（24 小時摘要）
-def _map_mss(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
+def _map_mss(raw: Dict[str, Any]) -> List[ForecastRecord]:
     root = raw.get("data") if isinstance(raw.get("data"), dict) else raw
     items = root.get("items") if isinstance(root, dict) else None
-    out: List[Dict[str, Any]] = []
+    out: List[ForecastRecord] = []
     if isinstance(items, list) and items:
         it = items[0]
         date = _safe_get(it, "valid_period", "start") or _safe_get(it, "timestamp")
@@ -109,9 +122,9 @@ def _map_mss(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
     return out
 
 # 4) MET Norway
-def _map_metno(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
+def _map_metno(raw: Dict[str, Any]) -> List[ForecastRecord]:
     data = raw.get("data")
-    out: List[Dict[str, Any]] = []
+    out: List[ForecastRecord] = []
     if isinstance(data, dict):
         props = data.get("properties") if isinstance(data.get("properties"), dict) else None
         ts = props.get("timeseries") if isinstance(props, dict) else None
@@ -149,7 +162,7 @@ def _map_metno(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
     return out
 
 # 5) SMG（澳門 7 天 XML）
-def _map_smg(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
+def _map_smg(raw: Dict[str, Any]) -> List[ForecastRecord]:
     xml_str = raw.get("data")
     if not isinstance(xml_str, str) or not xml_str.strip().startswith("<"):
         return []
@@ -157,7 +170,7 @@ def _map_smg(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
         root = ET.fromstring(xml_str)
     except ET.ParseError:
         return []
-    out: List[Dict[str, Any]] = []
+    out: List[ForecastRecord] = []
     for wf in root.findall(".//Custom/WeatherForecast"):
         date = (wf.findtext("ValidFor") or "").strip()
         text = (wf.findtext("WeatherDescription") or "").strip()
@@ -173,9 +186,9 @@ def _map_smg(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
     return out
 
 # 6) BOM（保留）
-def _map_bom(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
+def _map_bom(raw: Dict[str, Any]) -> List[ForecastRecord]:
     root = raw.get("data") if isinstance(raw.get("data"), dict) else raw
-    out: List[Dict[str, Any]] = []
+    out: List[ForecastRecord] = []
     periods = _safe_get(root, "product", "periods", default=[])
     if isinstance(periods, list) and periods:
         for p in periods:
@@ -205,9 +218,9 @@ def _map_bom(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
                         )
                 if out:
                     break
-    dedup: Dict[str, Dict[str, Any]] = {}
+    dedup: Dict[str, ForecastRecord] = {}
     for it in out:
-        d = it.get("date")
+        d = it.date
         if d and d not in dedup:
             dedup[d] = it
     return list(dedup.values())
@@ -219,10 +232,10 @@ def _f_to_c(v: Any) -> Optional[float]:
     except Exception:
         return None
 
-def _map_noaa(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
+def _map_noaa(raw: Dict[str, Any]) -> List[ForecastRecord]:
     root = raw.get("data") if isinstance(raw.get("data"), dict) else raw
     periods = _safe_get(root, "properties", "periods", default=[]) or []
-    out: List[Dict[str, Any]] = []
+    out: List[ForecastRecord] = []
     by_date: Dict[str, Dict[str, Any]] = {}
     for p in periods:
         d = _as_iso_date(p.get("startTime"))
@@ -246,7 +259,7 @@ def _map_noaa(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
     return out
 
 # 8) 通用 mapper（保底）
-def _map_generic(raw: Dict[str, Any], src_name: str) -> List[Dict[str, Any]]:
+def _map_generic(raw: Dict[str, Any], src_name: str) -> List[ForecastRecord]:
     root = raw.get("data") if isinstance(raw.get("data"), (list, dict)) else raw
     arr = None
     for key in ("forecasts","daily","items","days","list","data","periods"):
@@ -255,7 +268,7 @@ def _map_generic(raw: Dict[str, Any], src_name: str) -> List[Dict[str, Any]]:
             arr = v; break
     if arr is None and isinstance(root, list):
         arr = root
-    out: List[Dict[str, Any]] = []
+    out: List[ForecastRecord] = []
     if not isinstance(arr, list):
         return out
     for d in arr:
@@ -269,7 +282,7 @@ def _map_generic(raw: Dict[str, Any], src_name: str) -> List[Dict[str, Any]]:
     return out[:10]
 
 # 入口
-def normalize_one(provider: str) -> List[Dict[str, Any]]:
+def normalize_one(provider: str) -> List[ForecastRecord]:
     p = RAW / provider / "latest.json"
     if not p.exists():
         return []
@@ -277,7 +290,7 @@ def normalize_one(provider: str) -> List[Dict[str, Any]]:
     if not raw.get("ok"):
         return []
     try:
-        result: List[Dict[str, Any]] = []
+        result: List[ForecastRecord] = []
         if provider == "hko":
             result = _map_hko(raw)
         elif provider == "jma":
@@ -302,24 +315,22 @@ def normalize_one(provider: str) -> List[Dict[str, Any]]:
             return []
 
 def main():
-    all_items: Dict[str, List[Dict[str, Any]]] = {}
+    all_items: Dict[str, List[ForecastRecord]] = {}
     for prov in PROVIDERS:
         arr = normalize_one(prov)
         if arr:
             all_items[prov] = arr[:10]
 
-    (OUT / "normalized.json").write_text(
-        json.dumps(all_items, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    # 只在 JSON 輸出邊界才轉成 dict
+    write_product(OUT / "normalized.json", {k: [it.to_dict() for it in v] for k, v in all_items.items()})
 
     flat = []
     for k, v in all_items.items():
+        src = k.upper()
         for it in v:
-            x = it.copy(); x["src"] = k.upper()
+            x = it.to_dict(); x["src"] = src
             flat.append(x)
-    (OUT / "normalized_flat.json").write_text(
-        json.dumps(flat, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    write_product(OUT / "normalized_flat.json", flat)
 
 if __name__ == "__main__":
     main()
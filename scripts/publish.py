@@ -0,0 +1,227 @@
+# scripts/publish.py
+# 產品發佈：與上一版比對後才寫檔，並把差異記錄為 JSON Patch 風格的變更檔
+# - 內容未變：不碰檔案（避免 git commit 雜訊）
+# - 內容有變：版本號 +1，寫一個小檔 data/processed/changes/<產品名去副檔名>/<version>.json，
+#   並更新索引 data/processed/changes/<產品名>.json（只保留最近 MAX_ENTRIES 版）
+# 客戶端記住 (epoch, version)：epoch 相同且 version >= 索引 min_from 時，
+# 依序下載 version+1 … 的 patch 套用；否則重新下載完整檔案。
+from __future__ import annotations
+import hashlib, json, os, pathlib, secrets, tempfile, time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+CHANGES_DIRNAME = "changes"
+MAX_ENTRIES = 24    # 保留的 patch 數（3 小時一次 ≈ 3 天）
+HEARTBEAT = "heartbeat.json"
+
+# 清單項目以這些欄位對齊（依序嘗試，須在新舊清單皆唯一）
+LIST_KEYS: Tuple[Tuple[str, ...], ...] = (("date", "src"), ("date",))
+
+# mkstemp 預設 0600；改回一般 write_text 的權限（0666 & ~umask）
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# ---------- 小工具 ----------
+def _load_json(p: pathlib.Path) -> Optional[Any]:
+    if not p.exists():
+        return None
+    try:
+        return json.loads(p.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+
+def _dump(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+def _dump_compact(obj: Any) -> str:
+    # patch 只給程式讀，用緊湊格式
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def _now_utc() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+def _write_atomic(p: pathlib.Path, text: str) -> None:
+    # 先寫暫存檔再 os.replace，避免中途當機留下半個檔案
+    p.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=p.parent, prefix=f".{p.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.chmod(tmp, 0o666 & ~_UMASK)
+        os.replace(tmp, p)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+def _ptr(path: str, key: Any) -> str:
+    # RFC 6901：~ → ~0、/ → ~1
+    return path + "/" + str(key).replace("~", "~0").replace("/", "~1")
+
+def _same(a: Any, b: Any) -> bool:
+    # 1 與 1.0、True 與 1 在 JSON 輸出不同，需連型別一起比（逐層遞迴）
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_same(v, b[k]) for k, v in a.items())
+    if isinstance(a, list):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    return a == b
+
+def _strip(obj: Any, ignore: Iterable[str]) -> Any:
+    if isinstance(obj, dict) and ignore:
+        return {k: v for k, v in obj.items() if k not in ignore}
+    return obj
+
+def _list_key(old: List[Any], new: List[Any]) -> Optional[Tuple[str, ...]]:
+    for fields in LIST_KEYS:
+        ok = True
+        for arr in (old, new):
+            seen = set()
+            for it in arr:
+                if not isinstance(it, dict) or any(it.get(f) is None for f in fields):
+                    ok = False; break
+                k = tuple(it[f] for f in fields)
+                if k in seen:
+                    ok = False; break
+                seen.add(k)
+            if not ok:
+                break
+        if ok:
+            return fields
+    return None
+
+# ---------- 差異 ----------
+def _diff_list_keyed(old: List[Any], new: List[Any], path: str,
+                     fields: Tuple[str, ...]) -> Optional[List[Dict[str, Any]]]:
+    """以 key 對齊（如逐日滾動的預報）；保留項目順序若被打亂則回傳 None"""
+    key = lambda it: tuple(it[f] for f in fields)
+    new_keys = {key(it): i for i, it in enumerate(new)}
+    kept = [it for it in old if key(it) in new_keys]
+    order = [new_keys[key(it)] for it in kept]
+    if order != sorted(order):
+        return None
+    ops: List[Dict[str, Any]] = []
+    # 由尾端往前刪，索引才不會位移
+    for i in range(len(old) - 1, -1, -1):
+        if key(old[i]) not in new_keys:
+            ops.append({"op": "remove", "path": _ptr(path, i)})
+    j = 0
+    for i, it in enumerate(new):
+        if j < len(kept) and key(kept[j]) == key(it):
+            ops.extend(diff(kept[j], it, _ptr(path, i)))
+            j += 1
+        else:
+            ops.append({"op": "add", "path": _ptr(path, i), "value": it})
+    return ops
+
+def diff(old: Any, new: Any, path: str = "") -> List[Dict[str, Any]]:
+    """回傳把 old 變成 new 的 JSON Patch ops（add / remove / replace）"""
+    if _same(old, new):
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops: List[Dict[str, Any]] = []
+        for k in old:
+            if k not in new:
+                ops.append({"op": "remove", "path": _ptr(path, k)})
+        for k, v in new.items():
+            if k not in old:
+                ops.append({"op": "add", "path": _ptr(path, k), "value": v})
+            else:
+                ops.extend(diff(old[k], v, _ptr(path, k)))
+        return ops
+    if isinstance(old, list) and isinstance(new, list):
+        fields = _list_key(old, new)
+        if fields:
+            keyed = _diff_list_keyed(old, new, path, fields)
+            if keyed is not None:
+                return keyed
+        ops = []
+        n = min(len(old), len(new))
+        for i in range(n):
+            ops.extend(diff(old[i], new[i], _ptr(path, i)))
+        for i in range(len(old) - 1, n - 1, -1):
+            ops.append({"op": "remove", "path": _ptr(path, i)})
+        for i in range(n, len(new)):
+            ops.append({"op": "add", "path": _ptr(path, "-"), "value": new[i]})
+        return ops
+    return [{"op": "replace", "path": path, "value": new}]
+
+# ---------- 發佈 ----------
+def write_heartbeat(out_dir: pathlib.Path) -> None:
+    """每次執行都更新的新鮮度時間戳（不進變更記錄；前端以此顯示「更新時間」）"""
+    payload = {"as_of_utc": time.strftime("%Y-%m-%d %H:%M UTC", time.gmtime())}
+    _write_atomic(pathlib.Path(out_dir) / HEARTBEAT, _dump(payload))
+
+def write_product(path: pathlib.Path, obj: Any, ignore: Iterable[str] = ()) -> bool:
+    """寫出產品；回傳檔案是否真的有變更。
+
+    ignore：比對時略過的頂層欄位（例如每次都會變的 as_of_utc），
+    只有這些欄位不同時不重寫檔案。
+    """
+    path = pathlib.Path(path)
+    ignore = tuple(ignore)
+    text = _dump(obj)
+    cur_text = path.read_text(encoding="utf-8") if path.exists() else None
+    old = _load_json(path)
+
+    changes = path.parent / CHANGES_DIRNAME
+    index_path = changes / path.name
+    patch_dir = changes / path.stem
+    index = _load_json(index_path)
+    # 索引須與磁碟上的產品一致（sha256），否則歷史不可信 → 開新 epoch
+    index_ok = (
+        isinstance(index, dict)
+        and isinstance(index.get("patches"), list)
+        and cur_text is not None
+        and index.get("sha256") == _sha256(cur_text)
+    )
+
+    unchanged = cur_text is not None and (
+        cur_text == text
+        or (bool(ignore) and old is not None and _dump(_strip(old, ignore)) == _dump(_strip(obj, ignore)))
+    )
+    if unchanged:
+        if index_ok:
+            return False
+        # 產品不動，只為磁碟上現有內容補開新 epoch
+        text = cur_text
+
+    patch = None
+    if index_ok:
+        # 文字不同但結構相同（如鍵順序）、或 patch 比整份還大時，改用整份 replace
+        ops = diff(old, obj) if old is not None else []
+        if not ops or len(_dump_compact(ops)) >= len(_dump_compact(obj)):
+            ops = [{"op": "replace", "path": "", "value": obj}]
+        version = int(index.get("version") or 0) + 1
+        at = _now_utc()
+        patch = {"product": path.name, "epoch": index["epoch"],
+                 "version": version, "from": version - 1, "at_utc": at, "ops": ops}
+        patches = index["patches"] + [{"version": version, "at_utc": at}]
+        index["patches"] = patches[-MAX_ENTRIES:]
+        index["version"] = version
+    else:
+        # 新 epoch：沒有可套用的歷史，客戶端須重新下載完整檔案
+        index = {"product": path.name,
+                 "epoch": f"{_now_utc()}-{secrets.token_hex(4)}",
+                 "version": 0, "patches": []}
+    index["min_from"] = index["patches"][0]["version"] - 1 if index["patches"] else index["version"]
+    index["sha256"] = _sha256(text)
+
+    # 順序：產品 → patch → 索引；中途當機時 sha256 對不上，下次自動開新 epoch
+    changed = cur_text != text
+    if changed:
+        _write_atomic(path, text)
+    if patch is not None:
+        _write_atomic(patch_dir / f"{patch['version']}.json", _dump_compact(patch))
+    keep = {f"{p['version']}.json" for p in index["patches"]}
+    if patch_dir.is_dir():
+        for f in patch_dir.glob("*.json"):
+            if f.name not in keep:
+                f.unlink()
+    _write_atomic(index_path, _dump(index))
+    return changed
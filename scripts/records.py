@@ -0,0 +1,26 @@
+# scripts/records.py
+# 統一的單日預報紀錄（__slots__，省記憶體）；只在 JSON 輸出/讀入時轉 dict
+from __future__ import annotations
+from typing import Any, Dict, Optional
+
+class ForecastRecord:
+    __slots__ = ("date", "text", "tmin", "tmax", "src")
+
+    def __init__(self, date: Optional[str], text: Optional[str],
+                 tmin: Optional[float] = None, tmax: Optional[float] = None, src: str = ""):
+        self.date = date
+        self.text = text
+        self.tmin = tmin
+        self.tmax = tmax
+        self.src = src
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"date": self.date, "text": self.text,
+                "tmin": self.tmin, "tmax": self.tmax, "src": self.src}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "ForecastRecord":
+        return cls(d.get("date"), d.get("text"), d.get("tmin"), d.get("tmax"), d.get("src") or "")
+
+    def __repr__(self) -> str:
+        return f"ForecastRecord({self.date!r}, {self.text!r}, {self.tmin!r}, {self.tmax!r}, {self.src!r})"
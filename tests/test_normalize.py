@@ -0,0 +1,57 @@
+import pathlib, sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "scripts"))
+
+from normalize_all import _append, _as_iso_date, _clean_text
+from records import ForecastRecord
+
+
+def test_as_iso_date_formats():
+    assert _as_iso_date("20251022") == "2025-10-22"
+    assert _as_iso_date(20251022) == "2025-10-22"
+    assert _as_iso_date("2025/10/22") == "2025-10-22"
+    assert _as_iso_date("2025/10/22 09:00") == "2025-10-22"
+    assert _as_iso_date("2025-10-22") == "2025-10-22"
+    assert _as_iso_date("2025-10-22T03:00:00Z") == "2025-10-22"
+    assert _as_iso_date("2025-10-22T03:00:00+08:00") == "2025-10-22"
+    assert _as_iso_date("  2025-10-22  ") == "2025-10-22"
+
+
+def test_as_iso_date_passthrough_and_empty():
+    assert _as_iso_date(None) is None
+    assert _as_iso_date("") is None
+    assert _as_iso_date("2025-1-2") == "2025-1-2"
+    assert _as_iso_date(" 明天 ") == "明天"
+
+
+def test_clean_text_whitespace():
+    assert _clean_text("  多雲　有驟雨\xa0 \n 間中有雷暴  ") == "多雲 有驟雨 間中有雷暴"
+    assert _clean_text("a\t\tb") == "a b"
+    assert _clean_text("　 \xa0") is None
+    assert _clean_text("") is None
+    assert _clean_text(None) is None
+    assert _clean_text(12) is None
+
+
+def test_cached_helpers_are_stable_on_repeat():
+    for _ in range(3):
+        assert _as_iso_date("20251022") == "2025-10-22"
+        assert _clean_text(" Fine　 ") == "Fine"
+
+
+def test_append_builds_record():
+    out = []
+    _append(out, "20251022", " Sunny\xa0 ", "24", 30, "hko")
+    _append(out, None, None)
+    assert len(out) == 1
+    assert out[0].to_dict() == {"date": "2025-10-22", "text": "Sunny", "tmin": 24.0, "tmax": 30, "src": "HKO"}
+
+
+def test_forecast_record_round_trip():
+    d = {"date": "2025-10-22", "text": "Sunny", "tmin": 24.0, "tmax": None, "src": "SMG"}
+    rec = ForecastRecord.from_dict(d)
+    assert rec.to_dict() == d
+    assert list(rec.to_dict()) == ["date", "text", "tmin", "tmax", "src"]
+    assert ForecastRecord.from_dict({"date": "2025-10-22"}).to_dict() == \
+        {"date": "2025-10-22", "text": None, "tmin": None, "tmax": None, "src": ""}
+    assert not hasattr(rec, "__dict__")
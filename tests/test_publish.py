@@ -0,0 +1,174 @@
+import copy, json, os, pathlib, stat, sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "scripts"))
+
+from publish import diff, write_heartbeat, write_product
+
+
+def _apply(doc, ops):
+    doc = copy.deepcopy(doc)
+    for o in ops:
+        if o["path"] == "":
+            doc = copy.deepcopy(o["value"])
+            continue
+        parts = [p.replace("~1", "/").replace("~0", "~") for p in o["path"].split("/")[1:]]
+        cur = doc
+        for p in parts[:-1]:
+            cur = cur[int(p)] if isinstance(cur, list) else cur[p]
+        last = parts[-1]
+        if o["op"] == "remove":
+            del cur[int(last) if isinstance(cur, list) else last]
+        elif isinstance(cur, list) and last == "-":
+            cur.append(o["value"])
+        elif isinstance(cur, list) and o["op"] == "add":
+            cur.insert(int(last), o["value"])
+        elif isinstance(cur, list):
+            cur[int(last)] = o["value"]
+        else:
+            cur[last] = o["value"]
+    return doc
+
+
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _read(p):
+    return json.loads(p.read_text(encoding="utf-8"))
+
+
+def _days(start, n, src="HKO", tmax=30.0):
+    return [{"date": f"2026-08-{d:02d}", "text": f"day {d}", "tmin": 26.0, "tmax": tmax, "src": src}
+            for d in range(start, start + n)]
+
+
+def test_diff_is_type_strict_inside_containers():
+    pairs = [
+        ({"days": [{"tmin": 27}]}, {"days": [{"tmin": 27.0}]}),
+        ({"a": [True]}, {"a": [1]}),
+    ]
+    for old, new in pairs:
+        ops = diff(old, new)
+        assert ops
+        assert _dumps(_apply(old, ops)) == _dumps(new)
+
+
+def test_diff_roundtrip_lists_and_escaped_keys():
+    old = {"smg": [{"date": "2026-08-09", "tmax": 36.0}, {"date": "2026-08-10"}], "x": 1}
+    new = {"smg": [{"date": "2026-08-09", "tmax": 35.0}], "a/b~c": {"k": None}}
+    assert _dumps(_apply(old, diff(old, new))) == _dumps(new)
+
+
+def test_diff_aligns_rolling_days_by_date():
+    old = {"hko": _days(1, 9)}
+    new = {"hko": _days(2, 9)}
+    ops = diff(old, new)
+    assert [o["op"] for o in ops] == ["remove", "add"]
+    assert _dumps(_apply(old, ops)) == _dumps(new)
+
+
+def test_diff_aligns_flat_list_by_date_and_src():
+    old = _days(1, 3, "HKO") + _days(1, 3, "SMG") + _days(1, 3, "JMA")
+    new = _days(1, 3, "HKO") + _days(1, 3, "JMA")
+    new[-1]["tmax"] = 31.0
+    ops = diff(old, new)
+    assert len(ops) == 4   # 刪 3 筆 SMG + 1 個 tmax
+    assert _dumps(_apply(old, ops)) == _dumps(new)
+
+
+def test_write_product_versions_every_disk_change(tmp_path):
+    p = tmp_path / "p.json"
+    index_p = tmp_path / "changes" / "p.json"
+
+    assert write_product(p, {"days": [{"tmin": 27}]})
+    index = _read(index_p)
+    assert index["version"] == 0 and index["epoch"] and index["patches"] == []
+
+    assert not write_product(p, {"days": [{"tmin": 27}]})
+
+    assert write_product(p, {"days": [{"tmin": 27.0}], "note": "x" * 200})
+    index = _read(index_p)
+    assert index["version"] == 1 and index["min_from"] == 0
+    patch = _read(tmp_path / "changes" / "p" / "1.json")
+    assert patch["epoch"] == index["epoch"] and patch["from"] == 0
+    patched = _apply({"days": [{"tmin": 27}]}, patch["ops"])
+    assert _dumps(patched) == _dumps(_read(p))
+
+    # 只有鍵順序不同：仍須記錄版本
+    write_product(p, {"a": 1, "b": 2})
+    assert write_product(p, {"b": 2, "a": 1})
+    patch = _read(tmp_path / "changes" / "p" / f"{_read(index_p)['version']}.json")
+    assert patch["ops"] == [{"op": "replace", "path": "", "value": {"b": 2, "a": 1}}]
+
+
+def test_write_product_keeps_patches_small_and_bounded(tmp_path):
+    p = tmp_path / "normalized.json"
+    write_product(p, {"hko": _days(1, 9)})
+    for start in range(2, 40):
+        write_product(p, {"hko": _days(start % 20 + 1, 9, tmax=30.0 + start % 3)})
+        index = _read(tmp_path / "changes" / "normalized.json")
+        patch_text = (tmp_path / "changes" / "normalized" / f"{index['version']}.json").read_text(encoding="utf-8")
+        compact = json.dumps(_read(p), ensure_ascii=False, separators=(",", ":"))
+        assert len(patch_text) < len(compact) + 200
+    files = list((tmp_path / "changes" / "normalized").glob("*.json"))
+    assert len(files) == len(index["patches"]) <= 24
+    assert index["min_from"] == index["patches"][0]["version"] - 1
+
+
+def test_write_product_falls_back_to_full_replace_when_patch_is_larger(tmp_path):
+    p = tmp_path / "p.json"
+    write_product(p, {"hko": _days(1, 3)})
+    write_product(p, {"smg": _days(10, 3, "SMG")})
+    patch = _read(tmp_path / "changes" / "p" / "1.json")
+    assert patch["ops"] == [{"op": "replace", "path": "", "value": {"smg": _days(10, 3, "SMG")}}]
+
+
+def test_write_product_ignores_timestamp_fields(tmp_path):
+    p = tmp_path / "lb.json"
+    write_product(p, {"as_of_utc": "t1", "best": "HKO"}, ignore=("as_of_utc",))
+    assert not write_product(p, {"as_of_utc": "t2", "best": "HKO"}, ignore=("as_of_utc",))
+    assert _read(p)["as_of_utc"] == "t1"
+    assert write_product(p, {"as_of_utc": "t3", "best": "SMG"}, ignore=("as_of_utc",))
+
+
+def test_write_product_starts_new_epoch_when_index_out_of_sync(tmp_path):
+    p = tmp_path / "p.json"
+    index_p = tmp_path / "changes" / "p.json"
+    write_product(p, {"v": 1})
+    write_product(p, {"v": 2})
+    epoch = _read(index_p)["epoch"]
+
+    # 模擬寫完產品、寫索引前當機：sha256 對不上
+    p.write_text(json.dumps({"v": 3}, indent=2), encoding="utf-8")
+    write_product(p, {"v": 4})
+    index = _read(index_p)
+    assert index["epoch"] != epoch
+    assert index["version"] == 0 and index["patches"] == []
+    assert not list((tmp_path / "changes" / "p").glob("*.json"))
+
+
+def test_epochs_are_unique_within_one_second(tmp_path):
+    epochs = set()
+    for name in ("a.json", "b.json", "c.json"):
+        write_product(tmp_path / name, {"v": 1})
+        epochs.add(_read(tmp_path / "changes" / name)["epoch"])
+    assert len(epochs) == 3
+
+
+def test_written_files_follow_umask(tmp_path):
+    old = os.umask(0o022)
+    try:
+        import importlib, publish
+        importlib.reload(publish)
+        p = tmp_path / "p.json"
+        publish.write_product(p, {"v": 1})
+        publish.write_heartbeat(tmp_path)
+        for f in (p, tmp_path / "changes" / "p.json", tmp_path / "heartbeat.json"):
+            assert stat.S_IMODE(f.stat().st_mode) == 0o644
+    finally:
+        os.umask(old)
+
+
+def test_write_heartbeat(tmp_path):
+    write_heartbeat(tmp_path)
+    assert _read(tmp_path / "heartbeat.json")["as_of_utc"].endswith("UTC")